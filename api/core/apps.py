@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self) -> None:
+        # Los campos de los serializadores solo dependen de su Meta: se generan
+        # una vez al arrancar, cuando el registro de modelos ya está listo.
+        from .serializers import BaseModelSerializer
+
+        BaseModelSerializer.warm_fields_cache()
@@ -0,0 +1,77 @@
+"""Filtros de django-filter para los ViewSets de la API"""
+from django_filters.rest_framework import FilterSet
+
+from .models import (
+    Brand,
+    Category,
+    Customer,
+    Order,
+    OrderItem,
+    Payment,
+    Product,
+    Stock,
+    Warehouse,
+)
+
+
+class BrandFilterSet(FilterSet):
+    class Meta:
+        model = Brand
+        fields = ["id", "name", "is_active", "created_at"]
+
+
+class CategoryFilterSet(FilterSet):
+    class Meta:
+        model = Category
+        fields = ["id", "name", "is_active", "created_at"]
+
+
+class ProductFilterSet(FilterSet):
+    class Meta:
+        model = Product
+        fields = [
+            "id",
+            "name",
+            "sku",
+            "brand",
+            "category",
+            "is_active",
+            "price",
+            "created_at",
+        ]
+
+
+class WarehouseFilterSet(FilterSet):
+    class Meta:
+        model = Warehouse
+        fields = ["id", "name", "city", "created_at"]
+
+
+class StockFilterSet(FilterSet):
+    class Meta:
+        model = Stock
+        fields = ["id", "product", "warehouse", "qty", "reserved", "updated_at"]
+
+
+class CustomerFilterSet(FilterSet):
+    class Meta:
+        model = Customer
+        fields = ["id", "full_name", "email", "created_at"]
+
+
+class OrderFilterSet(FilterSet):
+    class Meta:
+        model = Order
+        fields = ["id", "status", "customer", "created_at"]
+
+
+class OrderItemFilterSet(FilterSet):
+    class Meta:
+        model = OrderItem
+        fields = ["id", "order", "product", "qty", "unit_price"]
+
+
+class PaymentFilterSet(FilterSet):
+    class Meta:
+        model = Payment
+        fields = ["id", "method", "status", "order", "amount", "created_at"]
@@ -13,6 +13,7 @@ class Brand(models.Model):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return self.name
@@ -23,6 +24,7 @@ class Category(models.Model):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return self.name
@@ -39,6 +41,7 @@ class Product(models.Model):
     )
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     brand = models.ForeignKey(
         "Brand",
         on_delete=models.PROTECT,
@@ -51,7 +54,10 @@ class Product(models.Model):
     )
 
     class Meta:
-        indexes = [Index(fields=["sku"], name="product_sku_idx")]
+        indexes = [
+            Index(fields=["sku"], name="product_sku_idx"),
+            Index(fields=["created_at", "id"], name="product_created_id_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.name} ({self.sku})"
@@ -62,6 +68,7 @@ class Warehouse(models.Model):
     name = models.CharField(max_length=255)
     city = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return f"{self.name} - {self.city}"
@@ -138,6 +145,8 @@ class Order(models.Model):
     class Meta:
         indexes = [
             Index(fields=["status", "created_at"], name="order_status_created_at_idx"),
+            Index(fields=["customer", "-created_at"], name="order_customer_created_idx"),
+            Index(fields=["created_at", "id"], name="order_created_id_idx"),
         ]
 
     def __str__(self) -> str:
@@ -198,6 +207,8 @@ class Payment(models.Model):
     class Meta:
         indexes = [
             Index(fields=["status", "created_at"], name="payment_status_created_at_idx"),
+            Index(fields=["method", "status"], name="payment_method_status_idx"),
+            Index(fields=["created_at", "id"], name="payment_created_id_idx"),
         ]
 
     def __str__(self) -> str:
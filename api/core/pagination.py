@@ -0,0 +1,96 @@
+"""Clases de paginación para la API"""
+from typing import Any, List, Optional
+
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+
+class UncountedPage:
+    """Página que sabe si existe una siguiente sin conocer el total de filas"""
+
+    def __init__(self, object_list: List[Any], number: int, has_next: bool) -> None:
+        self.object_list = object_list
+        self.number = number
+        self._has_next = has_next
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self.number > 1
+
+    def next_page_number(self) -> int:
+        return self.number + 1
+
+    def previous_page_number(self) -> int:
+        return self.number - 1
+
+
+class OptionalCountPageNumberPagination(pagination.PageNumberPagination):
+    """Paginación por número de página que permite omitir el COUNT(*) con ?count=false"""
+
+    count_query_param = "count"
+    count_disabled_values = ("false", "0", "no")
+
+    def paginate_queryset(self, queryset, request, view=None) -> Optional[List[Any]]:
+        self.include_count = self.counts_rows(request)
+        if self.include_count:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        page_number = self.get_uncounted_page_number(request)
+        offset = (page_number - 1) * page_size
+        # Se pide una fila extra para saber si hay página siguiente sin contar.
+        rows = list(queryset[offset : offset + page_size + 1])
+        if not rows and page_number > 1:
+            raise NotFound(
+                self.invalid_page_message.format(
+                    page_number=page_number, message="That page contains no results"
+                )
+            )
+
+        self.page = UncountedPage(rows[:page_size], page_number, len(rows) > page_size)
+        return self.page.object_list
+
+    def counts_rows(self, request) -> bool:
+        """Indica si la petición necesita el total de filas"""
+        return (
+            request.query_params.get(self.count_query_param, "").lower()
+            not in self.count_disabled_values
+        )
+
+    def get_uncounted_page_number(self, request) -> int:
+        raw_number = request.query_params.get(self.page_query_param) or 1
+        try:
+            page_number = int(raw_number)
+        except (TypeError, ValueError):
+            message = "That page number is not an integer"
+        else:
+            if page_number >= 1:
+                return page_number
+            message = "That page number is less than 1"
+        raise NotFound(
+            self.invalid_page_message.format(page_number=raw_number, message=message)
+        )
+
+    def get_paginated_response(self, data: List[Any]) -> Response:
+        if self.include_count:
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+
+class CreatedAtCursorPagination(pagination.CursorPagination):
+    """Paginación por cursor sobre (created_at, id), estable en páginas profundas"""
+
+    ordering = ("-created_at", "-id")
@@ -0,0 +1,31 @@
+"""Renderizadores JSON para la API"""
+from typing import Any, Mapping, Optional
+
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Reutiliza el encoder de DRF para los tipos que orjson no conoce (Decimal,
+# cadenas perezosas, QuerySets...) y así mantener el mismo formato de salida.
+_drf_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(BaseRenderer):
+    """Renderiza respuestas con orjson manteniendo el formato del JSONRenderer de DRF"""
+
+    media_type = "application/json"
+    format = "json"
+    charset = None
+    # Las fechas pasan por el encoder de DRF para conservar su representación
+    # ISO 8601 con sufijo "Z".
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None,
+    ) -> bytes:
+        if data is None:
+            return b""
+        return orjson.dumps(data, default=_drf_encoder.default, option=self.options)
@@ -1,8 +1,11 @@
 """Serializadores para los modelos principales"""
-from typing import Any, Dict
+import copy
+from typing import Any, ClassVar, Dict, List, Optional, Set, Tuple
 
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils.functional import cached_property
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
 
 from .models import (
     Brand,
@@ -17,12 +20,54 @@ from .models import (
 )
 
 
+class PkExistsField(serializers.PrimaryKeyRelatedField):
+    """Relación por clave primaria que solo lee la columna pk al validar"""
+
+    # Clave del contexto donde se memorizan las relaciones ya resueltas; el
+    # contexto es uno por serializador raíz, es decir, uno por petición.
+    cache_context_key = "related_pk_cache"
+
+    def get_queryset(self):
+        return super().get_queryset().only("pk")
+
+    @cached_property
+    def cache_key_prefix(self) -> Tuple[type, str]:
+        # Se incluye el SQL del queryset para que un campo más restrictivo sobre
+        # el mismo modelo no reutilice un id que solo aceptó otro campo.
+        queryset = self.get_queryset()
+        return queryset.model, str(queryset.query)
+
+    def to_internal_value(self, data: Any) -> Any:
+        cache = self.context.setdefault(self.cache_context_key, {})
+        key = (*self.cache_key_prefix, data)
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Valores no hashables: el campo padre los rechaza como tipo inválido.
+            return super().to_internal_value(data)
+        cache[key] = super().to_internal_value(data)
+        return cache[key]
+
+
 class BaseModelSerializer(serializers.ModelSerializer):
     """Configura campos comunes como solo lectura si están presente"""
 
     read_only_common_fields = ("id", "created_at", "updated_at")
 
+    # Campos generados por clase de serializador; los campos dependen solo de
+    # Meta, por lo que se construyen una vez y cada instancia recibe copias.
+    _fields_cache: ClassVar[Dict[type, Dict[str, serializers.Field]]] = {}
+
     def get_fields(self) -> Dict[str, serializers.Field]:
+        fields = self._fields_cache.get(type(self))
+        if fields is None:
+            fields = self.build_fields()
+            self._fields_cache[type(self)] = fields
+        return {name: self.copy_field(field) for name, field in fields.items()}
+
+    def build_fields(self) -> Dict[str, serializers.Field]:
         fields = super().get_fields()
         for field_name in self.read_only_common_fields:
             field = fields.get(field_name)
@@ -30,6 +75,29 @@ class BaseModelSerializer(serializers.ModelSerializer):
                 field.read_only = True
         return fields
 
+    @classmethod
+    def warm_fields_cache(cls) -> None:
+        """Genera los campos de todos los serializadores concretos (ver CoreConfig.ready)"""
+        pending = list(cls.__subclasses__())
+        while pending:
+            serializer_class = pending.pop()
+            pending.extend(serializer_class.__subclasses__())
+            if getattr(getattr(serializer_class, "Meta", None), "model", None) is not None:
+                serializer_class().get_fields()
+
+    @staticmethod
+    def copy_field(field: serializers.Field) -> serializers.Field:
+        # Los serializadores anidados, las relaciones múltiples y los campos
+        # ListField/DictField enlazan campos hijos, por lo que necesitan copia
+        # profunda para no compartir su padre.
+        if (
+            isinstance(field, serializers.BaseSerializer)
+            or hasattr(field, "child")
+            or hasattr(field, "child_relation")
+        ):
+            return copy.deepcopy(field)
+        return copy.copy(field)
+
 
 class BrandSerializer(BaseModelSerializer):
     class Meta:
@@ -46,8 +114,8 @@ class CategorySerializer(BaseModelSerializer):
 
 
 class ProductSerializer(BaseModelSerializer):
-    brand = serializers.PrimaryKeyRelatedField(queryset=Brand.objects.all())
-    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all())
+    brand = PkExistsField(queryset=Brand.objects.all())
+    category = PkExistsField(queryset=Category.objects.all())
 
     class Meta:
         model = Product
@@ -63,32 +131,16 @@ class WarehouseSerializer(BaseModelSerializer):
 
 
 class StockSerializer(BaseModelSerializer):
-    product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
-    warehouse = serializers.PrimaryKeyRelatedField(queryset=Warehouse.objects.all())
+    product = PkExistsField(queryset=Product.objects.all())
+    warehouse = PkExistsField(queryset=Warehouse.objects.all())
 
     class Meta:
         model = Stock
         fields = "__all__"
         read_only_fields = ("id", "updated_at")
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Stock.objects.all(),
-                fields=("product", "warehouse"),
-                message="Ya existe stock para este producto en esta bodega",
-            )
-        ]
-
-    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
-        instance = getattr(self, "instance", None)
-        qty = attrs.get("qty", getattr(instance, "qty", None))
-        reserved = attrs.get("reserved", getattr(instance, "reserved", None))
-
-        if qty is not None and reserved is not None and reserved > qty:
-            raise serializers.ValidationError(
-                {"reserved": "La cantidad reservada no puede exceder la cantidad total disponible"}
-            )
-
-        return super().validate(attrs)
+        # La unicidad producto/bodega y reserved <= qty se delegan a las
+        # restricciones de la base de datos (ver StockViewSet.save_stock).
+        validators = []
 
 
 class CustomerSerializer(BaseModelSerializer):
@@ -98,18 +150,45 @@ class CustomerSerializer(BaseModelSerializer):
         read_only_fields = ("id", "created_at")
 
 
+class OrderLineSerializer(BaseModelSerializer):
+    """Ítem recibido al crear una orden junto con sus líneas"""
+
+    product = PkExistsField(queryset=Product.objects.all())
+
+    class Meta:
+        model = OrderItem
+        fields = ("product", "qty", "unit_price")
+
+
 class OrderSerializer(BaseModelSerializer):
-    customer = serializers.PrimaryKeyRelatedField(queryset=Customer.objects.all())
+    customer = PkExistsField(queryset=Customer.objects.all())
+    items = OrderLineSerializer(many=True, write_only=True, required=False)
 
     class Meta:
         model = Order
         fields = "__all__"
         read_only_fields = ("id", "created_at")
 
+    def validate_items(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.instance is not None:
+            raise serializers.ValidationError("Los ítems solo pueden enviarse al crear la orden")
+        return items
+
+    def create(self, validated_data: Dict[str, Any]) -> Order:
+        items = validated_data.pop("items", [])
+        with transaction.atomic():
+            order = super().create(validated_data)
+            # Un único INSERT para todas las líneas en lugar de uno por ítem.
+            OrderItem.objects.bulk_create(
+                [OrderItem(order=order, **item) for item in items],
+                batch_size=500,
+            )
+        return order
+
 
 class OrderItemSerializer(BaseModelSerializer):
-    order = serializers.PrimaryKeyRelatedField(queryset=Order.objects.all())
-    product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
+    order = PkExistsField(queryset=Order.objects.all())
+    product = PkExistsField(queryset=Product.objects.all())
 
     class Meta:
         model = OrderItem
@@ -117,15 +196,47 @@ class OrderItemSerializer(BaseModelSerializer):
         read_only_fields = ("id",)
 
 
+class PaymentListSerializer(serializers.ListSerializer):
+    """Valida lotes de pagos consultando en una sola query qué órdenes ya tienen pago"""
+
+    def to_internal_value(self, data: Any) -> List[Dict[str, Any]]:
+        self.child.paid_order_ids = set(
+            Payment.objects.filter(order_id__in=self.get_order_ids(data)).values_list(
+                "order_id", flat=True
+            )
+        )
+        try:
+            return super().to_internal_value(data)
+        finally:
+            self.child.paid_order_ids = None
+
+    @staticmethod
+    def get_order_ids(data: Any) -> Set[Any]:
+        order_pk = Order._meta.pk
+        order_ids = set()
+        for item in data if isinstance(data, list) else []:
+            try:
+                order_ids.add(order_pk.to_python(item["order"]))
+            except (DjangoValidationError, KeyError, TypeError):
+                # Los valores inválidos los reporta luego la validación del campo.
+                continue
+        order_ids.discard(None)
+        return order_ids
+
+
 class PaymentSerializer(BaseModelSerializer):
-    order = serializers.PrimaryKeyRelatedField(
+    order = PkExistsField(
         queryset=Order.objects.all(), allow_null=True, required=False
     )
 
+    # Órdenes con pago precargadas por PaymentListSerializer al validar lotes.
+    paid_order_ids: Optional[Set[Any]] = None
+
     class Meta:
         model = Payment
         fields = "__all__"
         read_only_fields = ("id", "created_at")
+        list_serializer_class = PaymentListSerializer
 
     def validate_order(self, order: Order | None) -> Order | None:
         if order is None:
@@ -135,12 +246,18 @@ class PaymentSerializer(BaseModelSerializer):
         if instance is not None and instance.order_id == order.id:
             return order
 
-        try:
-            existing_payment = order.payment
-        except Payment.DoesNotExist:
-            existing_payment = None
+        if self.paid_order_ids is not None:
+            if order.id in self.paid_order_ids:
+                raise serializers.ValidationError("La orden ya tiene un pago registrado")
+            # Un segundo pago para la misma orden dentro del lote también se rechaza.
+            self.paid_order_ids.add(order.id)
+            return order
+
+        existing_payments = Payment.objects.filter(order_id=order.id)
+        if instance is not None:
+            existing_payments = existing_payments.exclude(pk=instance.pk)
 
-        if existing_payment is not None:
+        if existing_payments.exists():
             raise serializers.ValidationError("La orden ya tiene un pago registrado")
 
-        return order
\ No newline at end of file
+        return order
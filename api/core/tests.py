@@ -1,7 +1,17 @@
+import json
+from datetime import datetime, timezone
 from decimal import Decimal
+from unittest import mock
+from uuid import uuid4
 
-from django.core.exceptions import ValidationError
+from django.core.exceptions import ImproperlyConfigured, ValidationError
 from django.test import TestCase
+from django.utils.functional import lazy
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from config.urls import router
 
 # Create your tests here.
 from .models import (
@@ -9,15 +19,35 @@ from .models import (
     Category,
     Customer,
     Order,
+    OrderItem,
     Payment,
     Product,
     Stock,
     Warehouse,
 )
-from .serializers import PaymentSerializer, StockSerializer
+from .renderers import ORJSONRenderer
+from .serializers import (
+    BaseModelSerializer,
+    BrandSerializer,
+    OrderLineSerializer,
+    OrderSerializer,
+    PaymentSerializer,
+    PkExistsField,
+    ProductSerializer,
+    StockSerializer,
+)
+from .views import (
+    BaseViewSet,
+    BrandViewSet,
+    related_lookups,
+    serializer_columns,
+    values_columns,
+)
 
 
 class BaseModelTestCase(TestCase):
+    client_class = APIClient
+
     def setUp(self) -> None:
         self.brand = Brand.objects.create(name="Marca Test")
         self.category = Category.objects.create(name="Categoria Test")
@@ -35,81 +65,88 @@ class BaseModelTestCase(TestCase):
         self.order = Order.objects.create(customer=self.customer)
 
 
-class StockSerializerTests(BaseModelTestCase):
-    def test_prevents_reserved_greater_than_quantity_on_create(self) -> None:
-        serializer = StockSerializer(
-            data={
-                "product": str(self.product.id),
-                "warehouse": str(self.warehouse.id),
-                "qty": 5,
-                "reserved": 6,
-            }
-        )
-
-        self.assertFalse(serializer.is_valid())
-        self.assertIn("reserved", serializer.errors)
-        self.assertEqual(
-            serializer.errors["reserved"][0],
-            "La cantidad reservada no puede exceder la cantidad total disponible",
-        )
-
-    def test_prevents_reserved_greater_than_quantity_on_update(self) -> None:
-        stock = Stock.objects.create(
+class StockModelTests(BaseModelTestCase):
+    def test_model_clean_validates_reserved_quantity(self) -> None:
+        stock = Stock(
             product=self.product,
             warehouse=self.warehouse,
-            qty=10,
-            reserved=2,
+            qty=3,
+            reserved=4,
         )
 
-        serializer = StockSerializer(
-            instance=stock,
-            data={
-                "product": str(self.product.id),
-                "warehouse": str(self.warehouse.id),
-                "qty": 5,
-                "reserved": 6,
-            },
-        )
+        with self.assertRaises(ValidationError) as exc:
+            stock.full_clean()
 
-        self.assertFalse(serializer.is_valid())
-        self.assertIn("reserved", serializer.errors)
+        self.assertIn("reserved", exc.exception.error_dict)
 
-    def test_prevents_duplicate_stock_per_product_and_warehouse(self) -> None:
-        Stock.objects.create(
-            product=self.product,
-            warehouse=self.warehouse,
-            qty=5,
-            reserved=1,
-        )
 
-        serializer = StockSerializer(
+class BaseModelSerializerTests(BaseModelTestCase):
+    def test_instances_receive_their_own_bound_fields(self) -> None:
+        first = StockSerializer()
+        second = StockSerializer()
+
+        self.assertIsNot(first.fields["qty"], second.fields["qty"])
+        self.assertIs(first.fields["qty"].parent, first)
+        self.assertIs(second.fields["qty"].parent, second)
+        self.assertTrue(first.fields["updated_at"].read_only)
+
+    def test_child_fields_are_bound_to_each_copy(self) -> None:
+        class TaggedBrandSerializer(BaseModelSerializer):
+            tags = serializers.ListField(child=serializers.CharField(), required=False)
+
+            class Meta:
+                model = Brand
+                fields = ["id", "name", "tags"]
+
+        first = TaggedBrandSerializer()
+        second = TaggedBrandSerializer()
+
+        self.assertIsNot(first.fields["tags"].child, second.fields["tags"].child)
+        self.assertIs(first.fields["tags"].child.parent, first.fields["tags"])
+        self.assertIs(second.fields["tags"].child.parent, second.fields["tags"])
+
+    def test_warm_fields_cache_covers_every_model_serializer(self) -> None:
+        BaseModelSerializer._fields_cache.clear()
+
+        BaseModelSerializer.warm_fields_cache()
+
+        self.assertIn(StockSerializer, BaseModelSerializer._fields_cache)
+        self.assertIn(OrderLineSerializer, BaseModelSerializer._fields_cache)
+
+    def test_related_fields_only_load_the_primary_key(self) -> None:
+        serializer = ProductSerializer(
             data={
-                "product": str(self.product.id),
-                "warehouse": str(self.warehouse.id),
-                "qty": 5,
-                "reserved": 0,
+                "name": "Otro producto",
+                "sku": "SKU-002",
+                "price": "10.00",
+                "brand": str(self.brand.id),
+                "category": str(self.category.id),
             }
         )
 
-        self.assertFalse(serializer.is_valid())
-        self.assertIn("non_field_errors", serializer.errors)
-        self.assertEqual(
-            serializer.errors["non_field_errors"][0],
-            "Ya existe stock para este producto en esta bodega",
-        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        brand = serializer.validated_data["brand"]
+        self.assertEqual(brand.pk, self.brand.pk)
+        self.assertIn("name", brand.get_deferred_fields())
 
-    def test_model_clean_validates_reserved_quantity(self) -> None:
-        stock = Stock(
-            product=self.product,
-            warehouse=self.warehouse,
-            qty=3,
-            reserved=4,
-        )
 
-        with self.assertRaises(ValidationError) as exc:
-            stock.full_clean()
+class PkExistsFieldTests(BaseModelTestCase):
+    def test_cached_ids_respect_each_field_queryset(self) -> None:
+        class ProductPairSerializer(serializers.Serializer):
+            any_product = PkExistsField(queryset=Product.objects.all())
+            active_product = PkExistsField(queryset=Product.objects.filter(is_active=True))
 
-        self.assertIn("reserved", exc.exception.error_dict)
+        self.product.is_active = False
+        self.product.save()
+        product_id = str(self.product.id)
+
+        serializer = ProductPairSerializer(
+            data={"any_product": product_id, "active_product": product_id}
+        )
+
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors["active_product"][0].code, "does_not_exist")
+        self.assertNotIn("any_product", serializer.errors)
 
 
 class PaymentSerializerTests(BaseModelTestCase):
@@ -158,4 +195,441 @@ class PaymentSerializerTests(BaseModelTestCase):
         updated = serializer.save()
 
         self.assertEqual(updated.amount, Decimal("150.00"))
-        self.assertEqual(updated.status, Payment.Status.CONFIRMED)
\ No newline at end of file
+        self.assertEqual(updated.status, Payment.Status.CONFIRMED)
+
+    def test_batch_checks_existing_payments_in_one_query(self) -> None:
+        Payment.objects.create(
+            order=self.order,
+            method=Payment.Method.CARD,
+            amount=Decimal("100.00"),
+        )
+        other_order = Order.objects.create(customer=self.customer)
+        payment = {"method": Payment.Method.TRANSFER, "amount": "10.00"}
+
+        serializer = PaymentSerializer(
+            data=[
+                {**payment, "order": str(self.order.id)},
+                {**payment, "order": str(other_order.id)},
+                {**payment, "order": str(other_order.id)},
+            ],
+            many=True,
+        )
+
+        # Una query por cada orden distinta más una sola para los pagos existentes.
+        with self.assertNumQueries(3):
+            self.assertFalse(serializer.is_valid())
+
+        self.assertIn("order", serializer.errors[0])
+        self.assertEqual(serializer.errors[1], {})
+        self.assertIn("order", serializer.errors[2])
+
+
+class StockViewSetTests(BaseModelTestCase):
+    def test_list_reads_related_ids_without_joins(self) -> None:
+        Stock.objects.create(
+            product=self.product,
+            warehouse=self.warehouse,
+            qty=5,
+            reserved=1,
+        )
+
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/stocks/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["product"], self.product.id)
+
+    def test_prevents_reserved_greater_than_quantity_on_create(self) -> None:
+        response = self.client.post(
+            "/api/stocks/",
+            {
+                "product": str(self.product.id),
+                "warehouse": str(self.warehouse.id),
+                "qty": 5,
+                "reserved": 6,
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["reserved"][0],
+            "La cantidad reservada no puede exceder la cantidad total disponible",
+        )
+        self.assertFalse(Stock.objects.exists())
+
+    def test_prevents_reserved_greater_than_quantity_on_update(self) -> None:
+        stock = Stock.objects.create(
+            product=self.product,
+            warehouse=self.warehouse,
+            qty=10,
+            reserved=2,
+        )
+
+        response = self.client.put(
+            f"/api/stocks/{stock.id}/",
+            {
+                "product": str(self.product.id),
+                "warehouse": str(self.warehouse.id),
+                "qty": 5,
+                "reserved": 6,
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("reserved", response.data)
+        stock.refresh_from_db()
+        self.assertEqual((stock.qty, stock.reserved), (10, 2))
+
+    def test_prevents_duplicate_stock_per_product_and_warehouse(self) -> None:
+        Stock.objects.create(
+            product=self.product,
+            warehouse=self.warehouse,
+            qty=5,
+            reserved=1,
+        )
+
+        response = self.client.post(
+            "/api/stocks/",
+            {
+                "product": str(self.product.id),
+                "warehouse": str(self.warehouse.id),
+                "qty": 5,
+                "reserved": 0,
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["non_field_errors"][0],
+            "Ya existe stock para este producto en esta bodega",
+        )
+        self.assertEqual(Stock.objects.count(), 1)
+
+    def test_prevents_moving_stock_onto_an_existing_product_and_warehouse(self) -> None:
+        other_warehouse = Warehouse.objects.create(name="Norte", city="Ciudad")
+        Stock.objects.create(product=self.product, warehouse=self.warehouse, qty=5, reserved=1)
+        stock = Stock.objects.create(
+            product=self.product, warehouse=other_warehouse, qty=5, reserved=1
+        )
+
+        response = self.client.patch(
+            f"/api/stocks/{stock.id}/",
+            {"warehouse": str(self.warehouse.id)},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("non_field_errors", response.data)
+
+
+class ORJSONRendererTests(TestCase):
+    def test_matches_drf_json_renderer_output(self) -> None:
+        data = {
+            "id": uuid4(),
+            "amount": Decimal("10.50"),
+            "created_at": datetime(2025, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc),
+            "message": lazy(lambda: "mensaje", str)(),
+            "items": [1, "dos", None],
+        }
+
+        rendered = ORJSONRenderer().render(data)
+
+        self.assertEqual(json.loads(rendered), json.loads(JSONRenderer().render(data)))
+
+    def test_renders_empty_body_for_none(self) -> None:
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+
+class OptionalCountPaginationTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self) -> None:
+        Brand.objects.bulk_create([Brand(name=f"Marca {index:02d}") for index in range(25)])
+
+    def test_skips_count_query_when_disabled(self) -> None:
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/brands/", {"count": "false"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("count", response.data)
+        self.assertEqual(len(response.data["results"]), 20)
+        self.assertIn("page=2", response.data["next"])
+        self.assertIsNone(response.data["previous"])
+
+    def test_last_page_has_no_next_link(self) -> None:
+        response = self.client.get("/api/brands/", {"count": "false", "page": 2})
+
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertIsNone(response.data["next"])
+        self.assertIsNotNone(response.data["previous"])
+
+    def test_keeps_count_by_default(self) -> None:
+        response = self.client.get("/api/brands/")
+
+        self.assertEqual(response.data["count"], 25)
+
+
+class RelatedLookupsTests(TestCase):
+    def test_pk_relations_need_no_join(self) -> None:
+        self.assertEqual(related_lookups(StockSerializer(), Stock), ([], []))
+
+    def test_nested_serializers_are_joined_or_prefetched(self) -> None:
+        class ProductDetailSerializer(serializers.ModelSerializer):
+            brand = BrandSerializer()
+            stocks = StockSerializer(many=True)
+
+            class Meta:
+                model = Product
+                fields = ["id", "name", "brand", "category", "stocks"]
+
+        self.assertEqual(
+            related_lookups(ProductDetailSerializer(), Product),
+            (["brand"], ["stocks"]),
+        )
+
+
+class ValuesListTests(BaseModelTestCase):
+    def test_values_list_matches_serializer_output(self) -> None:
+        Warehouse.objects.create(name="Norte", city="Otra ciudad")
+        viewsets = [
+            (prefix, viewset)
+            for prefix, viewset, _ in router.registry
+            if viewset.get_list_values_fields()
+        ]
+        self.assertEqual(
+            sorted(prefix for prefix, _ in viewsets), ["brands", "categories", "warehouses"]
+        )
+
+        for prefix, viewset in viewsets:
+            with self.subTest(prefix=prefix):
+                response = self.client.get(f"/api/{prefix}/")
+
+                queryset = viewset.queryset.order_by(*viewset.ordering)
+                expected = viewset.serializer_class(queryset, many=True).data
+                self.assertEqual(
+                    json.loads(response.content)["results"],
+                    json.loads(ORJSONRenderer().render(expected)),
+                )
+
+    def test_values_columns_follow_the_serializer(self) -> None:
+        self.assertEqual(
+            values_columns(BrandSerializer(), Brand),
+            ("id", "name", "is_active", "created_at", "updated_at"),
+        )
+
+    def test_values_columns_reject_related_fields(self) -> None:
+        with self.assertRaises(ImproperlyConfigured):
+            values_columns(ProductSerializer(), Product)
+
+    def test_values_list_applies_filters(self) -> None:
+        Brand.objects.create(name="Otra marca", is_active=False)
+
+        response = self.client.get("/api/brands/", {"is_active": "false"})
+
+        self.assertEqual([row["name"] for row in response.data["results"]], ["Otra marca"])
+
+
+class SerializerColumnsTests(TestCase):
+    def test_all_fields_load_every_column(self) -> None:
+        self.assertIsNone(serializer_columns(ProductSerializer(), Product))
+
+    def test_declared_fields_limit_the_columns(self) -> None:
+        class ProductSummarySerializer(serializers.ModelSerializer):
+            class Meta:
+                model = Product
+                fields = ["sku", "name", "brand"]
+
+        self.assertEqual(
+            serializer_columns(ProductSummarySerializer(), Product),
+            ["id", "sku", "name", "brand"],
+        )
+
+    def test_unknown_sources_load_every_column(self) -> None:
+        class ProductLabelSerializer(serializers.ModelSerializer):
+            label = serializers.CharField(source="__str__")
+
+            class Meta:
+                model = Product
+                fields = ["id", "label"]
+
+        self.assertIsNone(serializer_columns(ProductLabelSerializer(), Product))
+
+    def test_nested_reverse_one_to_one_is_not_deferred(self) -> None:
+        customer = Customer.objects.create(full_name="Cliente", email="pago@example.com")
+        order = Order.objects.create(customer=customer)
+        Payment.objects.create(order=order, method=Payment.Method.CARD, amount=Decimal("5.00"))
+
+        class OrderPaymentSerializer(serializers.ModelSerializer):
+            payment = PaymentSerializer()
+
+            class Meta:
+                model = Order
+                fields = ["id", "status", "payment"]
+
+        class OrderPaymentViewSet(BaseViewSet):
+            queryset = Order.objects.all()
+            serializer_class = OrderPaymentSerializer
+
+        with self.assertNumQueries(1):
+            orders = list(OrderPaymentViewSet.get_base_queryset())
+            data = OrderPaymentSerializer(orders, many=True).data
+
+        self.assertEqual(data[0]["payment"]["amount"], "5.00")
+
+
+class OrderViewSetTests(BaseModelTestCase):
+    def test_creates_order_with_its_items(self) -> None:
+        items = [
+            {"product": str(self.product.id), "qty": 2, "unit_price": "100.00"},
+            {"product": str(self.product.id), "qty": 1, "unit_price": "90.00"},
+        ]
+
+        response = self.client.post(
+            "/api/orders/",
+            {"customer": str(self.customer.id), "items": items},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertNotIn("items", response.data)
+        order = Order.objects.get(pk=response.data["id"])
+        self.assertEqual(
+            sorted(order.items.values_list("qty", flat=True)),
+            [1, 2],
+        )
+
+    def test_resolves_repeated_products_once(self) -> None:
+        line = {"product": str(self.product.id), "qty": 1, "unit_price": "100.00"}
+        serializer = OrderSerializer(
+            data={"customer": str(self.customer.id), "items": [line, line, line]}
+        )
+
+        # Una query para el cliente y una sola para el producto repetido.
+        with self.assertNumQueries(2):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_rejects_items_on_update(self) -> None:
+        response = self.client.patch(
+            f"/api/orders/{self.order.id}/",
+            {"items": [{"product": str(self.product.id), "qty": 1, "unit_price": "1.00"}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("items", response.data)
+        self.assertFalse(OrderItem.objects.exists())
+
+
+class ConditionalResponseTests(BaseModelTestCase):
+    def test_list_returns_not_modified_for_matching_etag(self) -> None:
+        response = self.client.get("/api/brands/")
+        etag = response["ETag"]
+
+        with self.assertNumQueries(1):
+            cached = self.client.get("/api/brands/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached["ETag"], etag)
+
+    def test_list_etag_changes_when_a_row_is_updated(self) -> None:
+        etag = self.client.get("/api/brands/")["ETag"]
+        self.brand.name = "Marca renombrada"
+        self.brand.save()
+
+        response = self.client.get("/api/brands/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_etag_depends_on_the_query(self) -> None:
+        etag = self.client.get("/api/brands/")["ETag"]
+
+        response = self.client.get("/api/brands/", {"search": "Marca"}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_skips_etag_without_count(self) -> None:
+        response = self.client.get("/api/brands/", {"count": "false"})
+
+        self.assertNotIn("ETag", response)
+
+    def test_retrieve_returns_not_modified_for_matching_etag(self) -> None:
+        url = f"/api/brands/{self.brand.id}/"
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_product_etag_is_retrieve_only(self) -> None:
+        url = f"/api/products/{self.product.id}/"
+        etag = self.client.get(url)["ETag"]
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertNotIn("ETag", self.client.get("/api/products/"))
+
+
+class CursorPaginationTests(BaseModelTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        Order.objects.bulk_create([Order(customer=self.customer) for _ in range(24)])
+
+    def test_orders_are_paginated_by_cursor(self) -> None:
+        first_page = self.client.get("/api/orders/")
+
+        self.assertNotIn("count", first_page.data)
+        self.assertEqual(len(first_page.data["results"]), 20)
+        self.assertIn("cursor=", first_page.data["next"])
+
+        second_page = self.client.get(first_page.data["next"])
+
+        self.assertEqual(len(second_page.data["results"]), 5)
+        self.assertIsNone(second_page.data["next"])
+        seen = {row["id"] for row in first_page.data["results"] + second_page.data["results"]}
+        self.assertEqual(len(seen), Order.objects.count())
+
+
+class StreamingListTests(BaseModelTestCase):
+    def test_streams_values_rows_without_pagination(self) -> None:
+        Brand.objects.bulk_create([Brand(name=f"Marca {index:02d}") for index in range(25)])
+
+        response = self.client.get("/api/brands/", {"stream": "1"})
+
+        self.assertTrue(response.streaming)
+        rows = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(len(rows), Brand.objects.count())
+        self.assertEqual(rows[0]["name"], "Marca 00")
+
+    def test_streams_serialized_rows(self) -> None:
+        response = self.client.get("/api/products/", {"stream": "1"})
+
+        rows = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(rows[0]["brand"], str(self.brand.id))
+        self.assertEqual(response["Content-Type"], "application/json")
+
+    def test_stream_over_the_cap_is_rejected(self) -> None:
+        Brand.objects.bulk_create([Brand(name=f"Marca {index:02d}") for index in range(5)])
+
+        with mock.patch.object(BrandViewSet, "stream_max_rows", 5):
+            response = self.client.get("/api/brands/", {"stream": "1"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("stream", response.data)
+
+    def test_stream_at_the_cap_is_complete(self) -> None:
+        Brand.objects.bulk_create([Brand(name=f"Marca {index:02d}") for index in range(5)])
+
+        with mock.patch.object(BrandViewSet, "stream_max_rows", 6):
+            response = self.client.get("/api/brands/", {"stream": "1"})
+
+        self.assertEqual(len(json.loads(b"".join(response.streaming_content))), 6)
+
+    def test_stream_is_ignored_where_not_enabled(self) -> None:
+        response = self.client.get("/api/orders/", {"stream": "1"})
+
+        self.assertFalse(response.streaming)
+        self.assertIn("results", response.data)
@@ -1,6 +1,32 @@
+import hashlib
+from functools import lru_cache
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Model, QuerySet
+from django.db.models.constants import LOOKUP_SEP
+from django.http import StreamingHttpResponse
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import serializers, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny
+from rest_framework.renderers import BaseRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import ModelViewSet
 
+from .filters import (
+    BrandFilterSet,
+    CategoryFilterSet,
+    CustomerFilterSet,
+    OrderFilterSet,
+    OrderItemFilterSet,
+    PaymentFilterSet,
+    ProductFilterSet,
+    StockFilterSet,
+    WarehouseFilterSet,
+)
 from .models import (
     Brand,
     Category,
@@ -12,6 +38,8 @@ from .models import (
     Stock,
     Warehouse,
 )
+from .pagination import CreatedAtCursorPagination, OptionalCountPageNumberPagination
+from .renderers import ORJSONRenderer
 from .serializers import (
     BrandSerializer,
     CategorySerializer,
@@ -25,152 +53,380 @@ from .serializers import (
 )
 
 
-class BrandViewSet(ModelViewSet):
+def related_lookups(
+    serializer: serializers.BaseSerializer,
+    model: type[Model],
+    prefix: str = "",
+    many: bool = False,
+) -> Tuple[List[str], List[str]]:
+    """Calcula los select_related/prefetch_related que necesita la representación"""
+    select_related: List[str] = []
+    prefetch_related: List[str] = []
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+
+        source_attrs = field.source_attrs
+        if isinstance(field, serializers.RelatedField) and field.use_pk_only_optimization():
+            # El pk del objeto relacionado se lee de la columna <fk>_id.
+            source_attrs = source_attrs[:-1]
+
+        related_model, related_many, path = model, many, prefix
+        for attr in source_attrs:
+            try:
+                model_field = related_model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                break
+            if not model_field.is_relation:
+                break
+            path = f"{path}{LOOKUP_SEP}{attr}" if path else attr
+            related_many = related_many or model_field.one_to_many or model_field.many_to_many
+            (prefetch_related if related_many else select_related).append(path)
+            related_model = model_field.related_model
+        else:
+            nested = field.child if isinstance(field, serializers.ListSerializer) else field
+            if source_attrs and isinstance(nested, serializers.Serializer):
+                nested_select, nested_prefetch = related_lookups(
+                    nested, related_model, path, related_many
+                )
+                select_related.extend(nested_select)
+                prefetch_related.extend(nested_prefetch)
+
+    return select_related, prefetch_related
+
+
+def serializer_columns(
+    serializer: serializers.BaseSerializer, model: type[Model]
+) -> Optional[List[str]]:
+    """Columnas del modelo que lee la representación, o None si deben cargarse todas"""
+    meta = getattr(serializer, "Meta", None)
+    if meta is None or getattr(meta, "fields", None) == serializers.ALL_FIELDS:
+        return None
+
+    columns = [model._meta.pk.name]
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if not field.source_attrs:
+            # source="*" puede leer cualquier atributo de la instancia.
+            return None
+        try:
+            model_field = model._meta.get_field(field.source_attrs[0])
+        except FieldDoesNotExist:
+            # Propiedades o métodos: no se sabe qué columnas usan.
+            return None
+        if model_field.concrete:
+            columns.append(model_field.name)
+    return list(dict.fromkeys(columns))
+
+
+def values_columns(
+    serializer: serializers.BaseSerializer, model: type[Model]
+) -> Tuple[str, ...]:
+    """Columnas para listar con .values() las mismas claves que la representación"""
+    columns: List[str] = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            model_field = None
+        if model_field is None or not model_field.concrete or model_field.is_relation:
+            raise ImproperlyConfigured(
+                f"El campo '{name}' de {type(serializer).__name__} no es una columna "
+                "simple del modelo y no se puede listar con .values()"
+            )
+        columns.append(model_field.name)
+    return tuple(columns)
+
+
+def json_array(rows: Iterable[Any], renderer: BaseRenderer) -> Iterator[bytes]:
+    """Codifica las filas una a una como un arreglo JSON"""
+    yield b"["
+    for index, row in enumerate(rows):
+        if index:
+            yield b","
+        yield renderer.render(row)
+    yield b"]"
+
+
+class BaseViewSet(ModelViewSet):
+    """ViewSet base: carga las relaciones que usa el serializador para evitar N+1"""
+
+    permission_classes = [AllowAny]
+    # Lista con .values() las columnas del serializador, sin instanciar modelos
+    # ni serializadores. Solo para recursos cuyos campos son columnas simples.
+    list_as_values = False
+    # Campo de última modificación con el que se calcula el ETag de list y
+    # retrieve; con If-None-Match coincidente se responde 304 sin serializar.
+    # El ETag del listado agrega COUNT/MAX sobre todo el filtro, así que solo
+    # se usa en catálogos pequeños; list_etag = False lo deja solo en retrieve.
+    etag_field: Optional[str] = None
+    list_etag = True
+    # Con stream_enabled, ?stream=1 emite el listado sin paginar como un
+    # arreglo JSON en streaming, en lugar de construir la respuesta entera en
+    # memoria. Si el filtro supera stream_max_rows filas se responde 400.
+    stream_enabled = False
+    stream_query_param = "stream"
+    stream_chunk_size = 2000
+    stream_max_rows = 10000
+    stream_too_large_message = (
+        "El listado supera {max_rows} filas; use filtros o la paginación"
+    )
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def get_base_queryset(cls) -> QuerySet:
+        """Queryset de lectura con sus relaciones, construido una vez por clase"""
+        queryset = cls.queryset
+        serializer = cls.serializer_class()
+        select_related, prefetch_related = related_lookups(serializer, queryset.model)
+        if select_related:
+            queryset = queryset.select_related(*dict.fromkeys(select_related))
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*dict.fromkeys(prefetch_related))
+        columns = serializer_columns(serializer, queryset.model)
+        if columns is not None:
+            # Las relaciones de select_related no pueden quedar diferidas, incluidas
+            # las inversas uno a uno, que no son columnas del modelo.
+            queryset = queryset.only(*dict.fromkeys([*columns, *select_related]))
+        return queryset
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def get_list_values_fields(cls) -> Tuple[str, ...]:
+        """Columnas del listado con .values(), derivadas una vez por clase"""
+        if not cls.list_as_values:
+            return ()
+        return values_columns(cls.serializer_class(), cls.queryset.model)
+
+    def get_queryset(self):
+        if self.action in ("list", "retrieve"):
+            # .all() clona el queryset para no compartir su caché de resultados.
+            return self.get_base_queryset().all()
+        return super().get_queryset()
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag = self.get_list_etag(queryset)
+        if etag is not None and self.etag_matches(etag):
+            return self.not_modified(etag)
+
+        values_fields = self.get_list_values_fields()
+        if values_fields:
+            queryset = queryset.values(*values_fields)
+        if self.stream_enabled and request.query_params.get(self.stream_query_param) == "1":
+            return self.with_etag(self.stream_list(queryset), etag)
+
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else queryset
+        if values_fields:
+            data = list(rows)
+        else:
+            data = self.get_serializer(rows, many=True).data
+
+        if page is not None:
+            response = self.get_paginated_response(data)
+        else:
+            response = Response(data)
+        return self.with_etag(response, etag)
+
+    def stream_list(self, queryset: QuerySet) -> StreamingHttpResponse:
+        """Emite el listado completo, sin paginar, leyendo la base de datos por bloques"""
+        # Se comprueba antes de emitir: una vez iniciado el streaming ya no se
+        # puede avisar al cliente de que faltan filas.
+        if queryset[self.stream_max_rows :].exists():
+            raise ValidationError(
+                {
+                    self.stream_query_param: [
+                        self.stream_too_large_message.format(max_rows=self.stream_max_rows)
+                    ]
+                }
+            )
+        rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+        if not self.get_list_values_fields():
+            serializer = self.get_serializer()
+            rows = (serializer.to_representation(instance) for instance in rows)
+        return StreamingHttpResponse(
+            json_array(rows, ORJSONRenderer()), content_type=ORJSONRenderer.media_type
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = self.get_instance_etag(instance)
+        if etag is not None and self.etag_matches(etag):
+            return self.not_modified(etag)
+
+        response = Response(self.get_serializer(instance).data)
+        return self.with_etag(response, etag)
+
+    def get_list_etag(self, queryset: QuerySet) -> Optional[str]:
+        if self.etag_field is None or not self.list_etag:
+            return None
+        paginator = self.paginator
+        if isinstance(paginator, OptionalCountPageNumberPagination):
+            if not paginator.counts_rows(self.request):
+                # Con ?count=false no se agrega ninguna query de conteo.
+                return None
+        state = queryset.aggregate(total=Count("pk"), last_modified=Max(self.etag_field))
+        return self.make_etag(state["total"], state["last_modified"])
+
+    def get_instance_etag(self, instance: Model) -> Optional[str]:
+        if self.etag_field is None:
+            return None
+        return self.make_etag(instance.pk, getattr(instance, self.etag_field))
+
+    def make_etag(self, *parts: object) -> str:
+        # La ruta completa incluye filtros, orden y página de la petición.
+        key = "|".join(str(part) for part in (self.request.get_full_path(), *parts))
+        return quote_etag(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
+
+    def etag_matches(self, etag: str) -> bool:
+        if_none_match = parse_etags(self.request.META.get("HTTP_IF_NONE_MATCH", ""))
+        return etag in if_none_match or "*" in if_none_match
+
+    def not_modified(self, etag: str) -> Response:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    def with_etag(self, response: Response, etag: Optional[str]) -> Response:
+        if etag is not None:
+            response["ETag"] = etag
+        return response
+
+
+class BrandViewSet(BaseViewSet):
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
-    permission_classes = [AllowAny]
-    filterset_fields = ["id", "name", "is_active", "created_at"]
+    list_as_values = True
+    etag_field = "updated_at"
+    stream_enabled = True
+    filterset_class = BrandFilterSet
     search_fields = ["name"]
     ordering_fields = ["name", "created_at"]
     ordering = ("name",)
 
-class CategoryViewSet(ModelViewSet):
+class CategoryViewSet(BaseViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
-    permission_classes = [AllowAny]
-    filterset_fields = ["id", "name", "is_active", "created_at"]
+    list_as_values = True
+    etag_field = "updated_at"
+    stream_enabled = True
+    filterset_class = CategoryFilterSet
     search_fields = ["name"]
     ordering_fields = ["name", "created_at"]
     ordering = ("name",)
 
-class ProductViewSet(ModelViewSet):
+class ProductViewSet(BaseViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
-    permission_classes = [AllowAny]
-    filterset_fields = [
-        "id",
-        "name",
-        "sku",
-        "brand",
-        "category",
-        "is_active",
-        "price",
-        "created_at",
-    ]
+    etag_field = "updated_at"
+    list_etag = False
+    stream_enabled = True
+    filterset_class = ProductFilterSet
     search_fields = ["name", "sku", "brand__name", "category__name"]
     ordering_fields = ["name", "price", "created_at", "sku"]
-    ordering = ("-created_at",)
-
-    def get_queryset(self):
-        queryset = super().get_queryset().select_related("brand", "category")
-        if self.action == "retrieve":
-            queryset = queryset.prefetch_related("stocks")
-        return queryset
+    ordering = ("-created_at", "-id")
+    pagination_class = CreatedAtCursorPagination
 
 
-class WarehouseViewSet(ModelViewSet):
+class WarehouseViewSet(BaseViewSet):
     queryset = Warehouse.objects.all()
     serializer_class = WarehouseSerializer
-    permission_classes = [AllowAny]
-    filterset_fields = ["id", "name", "city", "created_at"]
+    list_as_values = True
+    etag_field = "updated_at"
+    stream_enabled = True
+    filterset_class = WarehouseFilterSet
     search_fields = ["name", "city"]
     ordering_fields = ["name", "city", "created_at"]
     ordering = ("name",)
 
-class StockViewSet(ModelViewSet):
+class StockViewSet(BaseViewSet):
     queryset = Stock.objects.all()
     serializer_class = StockSerializer
-    permission_classes = [AllowAny]
-    filterset_fields = [
-        "id",
-        "product",
-        "warehouse",
-        "qty",
-        "reserved",
-        "updated_at",
-    ]
+    filterset_class = StockFilterSet
     search_fields = ["product__name", "product__sku", "warehouse__name", "warehouse__city"]
     ordering_fields = ["qty", "reserved", "updated_at"]
     ordering = ("-updated_at",)
 
-    def get_queryset(self):
-        return (
-            super()
-            .get_queryset()
-            .select_related(
-                "product",
-                "product__brand",
-                "product__category",
-                "warehouse",
-            )
+    duplicate_stock_message = "Ya existe stock para este producto en esta bodega"
+    reserved_exceeds_qty_message = (
+        "La cantidad reservada no puede exceder la cantidad total disponible"
+    )
+
+    def perform_create(self, serializer: StockSerializer) -> None:
+        self.save_stock(serializer)
+
+    def perform_update(self, serializer: StockSerializer) -> None:
+        self.save_stock(serializer)
+
+    def save_stock(self, serializer: StockSerializer) -> None:
+        # La unicidad producto/bodega y reserved <= qty las garantizan las
+        # restricciones de la base de datos; el error se traduce solo si falla.
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            if self.exceeds_quantity(serializer):
+                raise ValidationError({"reserved": [self.reserved_exceeds_qty_message]})
+            if self.has_duplicate_stock(serializer):
+                raise ValidationError(
+                    {api_settings.NON_FIELD_ERRORS_KEY: [self.duplicate_stock_message]}
+                )
+            raise
+
+    def exceeds_quantity(self, serializer: StockSerializer) -> bool:
+        instance = serializer.instance
+        attrs = serializer.validated_data
+        qty = attrs.get("qty", getattr(instance, "qty", None))
+        reserved = attrs.get("reserved", getattr(instance, "reserved", None))
+        return qty is not None and reserved is not None and reserved > qty
+
+    def has_duplicate_stock(self, serializer: StockSerializer) -> bool:
+        instance = serializer.instance
+        attrs = serializer.validated_data
+        duplicates = Stock.objects.filter(
+            product=attrs.get("product", getattr(instance, "product", None)),
+            warehouse=attrs.get("warehouse", getattr(instance, "warehouse", None)),
         )
+        if instance is not None:
+            duplicates = duplicates.exclude(pk=instance.pk)
+        return duplicates.exists()
 
 
-class CustomerViewSet(ModelViewSet):
+class CustomerViewSet(BaseViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
-    permission_classes = [AllowAny]
-    filterset_fields = ["id", "full_name", "email", "created_at"]
+    filterset_class = CustomerFilterSet
     search_fields = ["full_name", "email"]
     ordering_fields = ["full_name", "email", "created_at"]
     ordering = ("full_name",)
 
-class OrderViewSet(ModelViewSet):
+class OrderViewSet(BaseViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
-    permission_classes = [AllowAny]
-    filterset_fields = ["id", "status", "customer", "created_at"]
+    filterset_class = OrderFilterSet
     search_fields = ["status", "customer__full_name", "customer__email"]
     ordering_fields = ["created_at", "status"]
-    ordering = ("-created_at",)
-
-    def get_queryset(self):
-        queryset = super().get_queryset().select_related("customer", "payment")
-        if self.action == "retrieve":
-            queryset = queryset.prefetch_related(
-                "items",
-                "items__product",
-                "items__product__brand",
-                "items__product__category",
-            )
-        return queryset
+    ordering = ("-created_at", "-id")
+    pagination_class = CreatedAtCursorPagination
 
 
-class OrderItemViewSet(ModelViewSet):
+class OrderItemViewSet(BaseViewSet):
     queryset = OrderItem.objects.all()
     serializer_class = OrderItemSerializer
-    permission_classes = [AllowAny]
-    filterset_fields = ["id", "order", "product", "qty", "unit_price"]
+    filterset_class = OrderItemFilterSet
     search_fields = ["product__name", "product__sku", "order__customer__full_name"]
     ordering_fields = ["qty", "unit_price"]
     ordering = ("-unit_price",)
 
-    def get_queryset(self):
-        return (
-            super()
-            .get_queryset()
-            .select_related(
-                "order",
-                "order__customer",
-                "product",
-                "product__brand",
-                "product__category",
-            )
-        )
-
 
-class PaymentViewSet(ModelViewSet):
+class PaymentViewSet(BaseViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
-    permission_classes = [AllowAny]
-    filterset_fields = ["id", "method", "status", "order", "amount", "created_at"]
+    filterset_class = PaymentFilterSet
     search_fields = ["method", "status", "order__customer__full_name", "order__customer__email"]
     ordering_fields = ["amount", "created_at", "status"]
-    ordering = ("-created_at",)
-
-    def get_queryset(self):
-        return (
-            super()
-            .get_queryset()
-            .select_related("order", "order__customer")
-        )
\ No newline at end of file
+    ordering = ("-created_at", "-id")
+    pagination_class = CreatedAtCursorPagination